@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Callable
 import logging
 
 from ym_bridge.app import run
@@ -13,7 +14,16 @@ def main() -> None:
         level=getattr(logging, args.log_level.upper(), logging.INFO),
         format="%(asctime)s %(levelname)s %(name)s: %(message)s",
     )
-    asyncio.run(run(args))
+    loop_factory = _daemon_loop_factory() if (args.command or "run") == "run" else None
+    asyncio.run(run(args), loop_factory=loop_factory)
+
+
+def _daemon_loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return uvloop.new_event_loop
 
 
 if __name__ == "__main__":
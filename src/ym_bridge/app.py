@@ -2,17 +2,27 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import json
+from collections.abc import Awaitable, Callable
+import dataclasses
+import functools
 import logging
-from pathlib import Path
+import os
 import shutil
+import struct
+import sys
 import time
+from typing import TYPE_CHECKING
+import zlib
 
 from ym_bridge.config import AppConfig, load_config
 from ym_bridge.controller import BridgeController
-from ym_bridge.ipc import BridgeIpcServer, send_ipc
-from ym_bridge.mpris import BridgeMprisService
-from ym_bridge.yandex import YandexClientConfig, YandexMusicProvider, run_recon
+from ym_bridge.ipc import BridgeIpcClient, BridgeIpcServer, send_ipc
+from ym_bridge.serialization import dumps
+
+# The Yandex client (httpx) and MPRIS (dbus-next) stacks are imported by the commands that use them, so IPC-only
+# commands such as ctl and waybar start without loading either.
+if TYPE_CHECKING:
+    from ym_bridge.yandex import YandexClientConfig, YandexMusicProvider
 
 ACTIVITY_MAP = {
     "wake-up": "activity:wake-up",
@@ -26,58 +36,58 @@ DIVERSITY_MAP = {
     "discover": "diverse",
 }
 
+_VIBE_PREFIXES = ("settingDiversity:", "settingMoodEnergy:", "settingLanguage:")
+
+_STATUS_ICONS = {"Playing": "▶", "Paused": "⏸", "Stopped": "■"}
+_STATUS_DEFAULT = "■"
+_WAYBAR_OFFLINE = {
+    "text": "YM offline",
+    "class": ["offline"],
+    "tooltip": "ym-bridge daemon not running",
+}
+
+WAYBAR_STATE_PATH = "/tmp/ym-bridge-waybar-state.bin"
+# cursor, updated_at, crc32(key)
+_WAYBAR_STATE = struct.Struct("<QqI")
+
 
 def _build_vibe_seeds(args: argparse.Namespace) -> list[str]:
     seeds: list[str] = []
     if args.activity:
-        seeds.append(ACTIVITY_MAP.get(args.activity, f"activity:{args.activity}"))
-    if args.diversity:
-        diversity = DIVERSITY_MAP.get(args.diversity, args.diversity)
-        seeds.append(f"settingDiversity:{diversity}")
-    if args.mood:
-        seeds.append(f"settingMoodEnergy:{args.mood}")
-    if args.language:
-        seeds.append(f"settingLanguage:{args.language}")
+        seeds.append(ACTIVITY_MAP.get(args.activity) or "activity:" + args.activity)
+    diversity = DIVERSITY_MAP.get(args.diversity, args.diversity)
+    for prefix, value in zip(_VIBE_PREFIXES, (diversity, args.mood, args.language)):
+        if value:
+            seeds.append(prefix + value)
     if args.seed:
         seeds.extend(str(seed) for seed in args.seed)
     return seeds
 
 
+@functools.cache
+def _client_config_fields() -> tuple[str, ...]:
+    from ym_bridge.yandex import YandexClientConfig
+
+    # YandexClientConfig fields are a strict subset of AppConfig fields with identical names.
+    return tuple(field.name for field in dataclasses.fields(YandexClientConfig))
+
+
 def build_client_config(config: AppConfig) -> YandexClientConfig:
-    return YandexClientConfig(
-        base_url=config.base_url,
-        oauth_token=config.oauth_token,
-        device_id=config.device_id,
-        autoplay_on_start=config.autoplay_on_start,
-        user_agent=config.user_agent,
-        accept_language=config.accept_language,
-        music_client=config.music_client,
-        content_type=config.content_type,
-        device_header=config.device_header,
-        endpoint_state=config.endpoint_state,
-        endpoint_play=config.endpoint_play,
-        endpoint_pause=config.endpoint_pause,
-        endpoint_play_pause=config.endpoint_play_pause,
-        endpoint_stop=config.endpoint_stop,
-        endpoint_next=config.endpoint_next,
-        endpoint_previous=config.endpoint_previous,
-        endpoint_seek=config.endpoint_seek,
-        endpoint_set_position=config.endpoint_set_position,
-        endpoint_volume=config.endpoint_volume,
-        endpoint_account_about=config.endpoint_account_about,
-        endpoint_rotor_session_new=config.endpoint_rotor_session_new,
-        endpoint_rotor_session_tracks=config.endpoint_rotor_session_tracks,
-        endpoint_rotor_sessions_feedbacks=config.endpoint_rotor_sessions_feedbacks,
-        endpoint_likes_tracks_add=config.endpoint_likes_tracks_add,
-        endpoint_likes_tracks_remove=config.endpoint_likes_tracks_remove,
-        endpoint_dislikes_tracks_add=config.endpoint_dislikes_tracks_add,
-        endpoint_plays=config.endpoint_plays,
-        rotor_seeds=config.rotor_seeds,
-    )
+    from ym_bridge.yandex import YandexClientConfig
+
+    return YandexClientConfig(**{name: getattr(config, name) for name in _client_config_fields()})
+
+
+def _build_provider(config: AppConfig) -> YandexMusicProvider:
+    from ym_bridge.yandex import YandexMusicProvider
+
+    return YandexMusicProvider(build_client_config(config))
 
 
 async def run_daemon(config: AppConfig) -> None:
-    provider = YandexMusicProvider(build_client_config(config))
+    from ym_bridge.mpris import BridgeMprisService
+
+    provider = _build_provider(config)
     controller = BridgeController(provider=provider, poll_interval_seconds=config.poll_interval_seconds)
     mpris = BridgeMprisService(controller=controller, mpris_name=config.mpris_name)
     ipc = BridgeIpcServer(controller=controller, socket_path=config.control_socket_path)
@@ -96,6 +106,8 @@ async def run_daemon(config: AppConfig) -> None:
 
 
 async def run_recon_command(config: AppConfig) -> None:
+    from ym_bridge.yandex import run_recon
+
     results = await run_recon(
         base_url=config.base_url,
         oauth_token=config.oauth_token,
@@ -117,7 +129,7 @@ async def run_recon_command(config: AppConfig) -> None:
 
 
 async def run_account_command(config: AppConfig) -> None:
-    provider = YandexMusicProvider(build_client_config(config))
+    provider = _build_provider(config)
     try:
         about = await provider.fetch_account_about()
     except Exception as exc:  # noqa: BLE001
@@ -135,13 +147,12 @@ async def run_account_command(config: AppConfig) -> None:
         "serviceAvailable": about.get("serviceAvailable"),
         "geoRegionIso": about.get("geoRegionIso"),
     }
-    print(json.dumps(sanitized, indent=2))
+    _print_json(sanitized, indent=True)
 
 
 async def _run_track_action(config: AppConfig, action: str) -> None:
-    provider = YandexMusicProvider(build_client_config(config))
+    provider = _build_provider(config)
     try:
-        await provider.fetch_state()
         current = await provider.fetch_state()
         if action == "like":
             await provider.like_current()
@@ -159,33 +170,38 @@ async def _run_track_action(config: AppConfig, action: str) -> None:
         raise SystemExit(f"{action} command failed: {exc}") from exc
     finally:
         await provider.close()
-    print(json.dumps(payload, indent=2))
+    _print_json(payload)
 
 
 async def run_ctl_command(config: AppConfig, action: str) -> None:
     response = await send_ipc(config.control_socket_path, action)
     if not response.get("ok", False):
         raise SystemExit(f"ctl command failed: {response.get('error', 'unknown error')}")
-    print(json.dumps(response, indent=2))
+    _print_json(response)
 
 
 async def run_vibe_command(config: AppConfig, args: argparse.Namespace) -> None:
     seeds = _build_vibe_seeds(args)
     if not seeds:
         current = await send_ipc(config.control_socket_path, "get_vibe")
-        print(json.dumps(current, indent=2))
+        _print_json(current)
         return
     response = await send_ipc(config.control_socket_path, "set_vibe", seeds=seeds)
     if not response.get("ok", False):
         raise SystemExit(f"vibe command failed: {response.get('error', 'unknown error')}")
-    print(json.dumps(response, indent=2))
+    _print_json(response)
 
 
 async def run_vibe_tui(config: AppConfig) -> None:
     print("ym-bridge vibe TUI")
     print("Press Enter to keep a field unchanged. q to cancel.")
 
-    current = await send_ipc(config.control_socket_path, "get_vibe")
+    async with BridgeIpcClient(config.control_socket_path) as client:
+        await _run_vibe_tui(client)
+
+
+async def _run_vibe_tui(client: BridgeIpcClient) -> None:
+    current = await client.call("get_vibe")
     if not current.get("ok", False):
         raise SystemExit(f"vibe-tui failed: {current.get('error', 'daemon not running')}")
     print(f"Current seeds: {', '.join(current.get('seeds', []))}")
@@ -206,24 +222,21 @@ async def run_vibe_tui(config: AppConfig) -> None:
     if extras.lower() == "q":
         return
 
-    seeds: list[str] = []
-    if activity:
-        seeds.append(ACTIVITY_MAP.get(activity, f"activity:{activity}"))
-    if diversity:
-        diversity_value = DIVERSITY_MAP.get(diversity, diversity)
-        seeds.append(f"settingDiversity:{diversity_value}")
-    if mood:
-        seeds.append(f"settingMoodEnergy:{mood}")
-    if language:
-        seeds.append(f"settingLanguage:{language}")
-    if extras:
-        seeds.extend(part.strip() for part in extras.split(",") if part.strip())
+    seeds = _build_vibe_seeds(
+        argparse.Namespace(
+            activity=activity,
+            diversity=diversity,
+            mood=mood,
+            language=language,
+            seed=[part.strip() for part in extras.split(",") if part.strip()],
+        )
+    )
 
     if not seeds:
         print("No changes requested.")
         return
 
-    response = await send_ipc(config.control_socket_path, "set_vibe", seeds=seeds)
+    response = await client.call("set_vibe", seeds=seeds)
     if not response.get("ok", False):
         raise SystemExit(f"vibe-tui failed: {response.get('error', 'unknown error')}")
     print("Updated seeds:", ", ".join(response.get("seeds", [])))
@@ -232,48 +245,44 @@ async def run_vibe_tui(config: AppConfig) -> None:
 async def run_waybar_command(config: AppConfig) -> None:
     response = await send_ipc(config.control_socket_path, "status")
     if not response.get("ok", False):
-        print(
-            json.dumps(
-                {
-                    "text": "YM offline",
-                    "class": ["offline"],
-                    "tooltip": "ym-bridge daemon not running",
-                }
-            )
-        )
+        _print_json(_WAYBAR_OFFLINE)
         return
 
-    state = response.get("state", {})
-    track = state.get("track", {})
-    vibe = state.get("vibe", {})
-    status = str(state.get("status", "Stopped"))
-    icon = {"Playing": "▶", "Paused": "⏸", "Stopped": "■"}.get(status, "■")
-    liked = bool(track.get("liked", False))
+    # The daemon's status payload already carries typed values, see BridgeIpcServer._state_payload.
+    state = response["state"]
+    track = state["track"]
+    status = state["status"]
+    liked = track["liked"]
+    liked_label = "Liked" if liked else "Not liked"
+    artist = track["artist"].strip()
+    title = track["title"].strip() or "No track"
+    icon = _STATUS_ICONS.get(status, _STATUS_DEFAULT)
     liked_icon = " ♥" if liked else ""
-    artist = str(track.get("artist", "")).strip()
-    title = str(track.get("title", "")).strip() or "No track"
-    full_text = f"{icon} {artist} - {title}{liked_icon}" if artist else f"{icon} {title}{liked_icon}"
+    if artist:
+        full_text = f"{icon} {artist} - {title}{liked_icon}"
+        tooltip = f"{artist}\n{title}\n{liked_label}"
+    else:
+        full_text = f"{icon} {title}{liked_icon}"
+        tooltip = f"{title}\n{liked_label}"
     text = _compact_waybar_text(full_text, max_length=config.waybar_max_length, scroll=config.waybar_scroll)
-    seeds = vibe.get("seeds", [])
-    vibe_line = ", ".join(str(seed) for seed in seeds) if isinstance(seeds, list) else ""
-    tooltip = (
-        f"{artist}\n{title}\n{'Liked' if liked else 'Not liked'}"
-        if artist
-        else f"{title}\n{'Liked' if liked else 'Not liked'}"
-    )
-    if vibe_line:
-        tooltip += f"\nVibe: {vibe_line}"
-    print(
-        json.dumps(
-            {
-                "text": text,
-                "class": [status.lower(), "liked" if liked else "unliked"],
-                "tooltip": tooltip,
-            }
-        )
+    seeds = state["vibe"]["seeds"]
+    if seeds:
+        tooltip += "\nVibe: " + ", ".join(seeds)
+    _print_json(
+        {
+            "text": text,
+            "class": [status.lower(), "liked" if liked else "unliked"],
+            "tooltip": tooltip,
+        }
     )
 
 
+def _print_json(payload: object, *, indent: bool = False) -> None:
+    sys.stdout.flush()
+    sys.stdout.buffer.write(dumps(payload, indent=indent) + b"\n")
+    sys.stdout.buffer.flush()
+
+
 def _compact_waybar_text(text: str, *, max_length: int, scroll: bool) -> str:
     if len(text) <= max_length:
         return text
@@ -289,36 +298,35 @@ def _compact_waybar_text(text: str, *, max_length: int, scroll: bool) -> str:
 
 
 def _next_waybar_cursor(key: str, span: int) -> int:
-    state_file = Path("/tmp/ym-bridge-waybar-state.json")
-    previous_key = ""
+    key_hash = zlib.crc32(key.encode("utf-8"))
     cursor = 0
-    if state_file.exists():
-        try:
-            data = json.loads(state_file.read_text(encoding="utf-8"))
-            previous_key = str(data.get("key", ""))
-            cursor = int(data.get("cursor", 0))
-        except Exception:  # noqa: BLE001
-            previous_key = ""
-            cursor = 0
-
-    if previous_key == key:
-        cursor = (cursor + 1) % max(span, 1)
-    else:
-        cursor = 0
+    try:
+        fd = os.open(WAYBAR_STATE_PATH, os.O_RDWR | os.O_CREAT, 0o600)
+    except OSError:
+        return cursor
 
     try:
-        state_file.write_text(
-            json.dumps({"key": key, "cursor": cursor, "updated_at": int(time.time())}),
-            encoding="utf-8",
-        )
-    except Exception:  # noqa: BLE001
+        data = os.pread(fd, _WAYBAR_STATE.size, 0)
+        if len(data) == _WAYBAR_STATE.size:
+            previous_cursor, _, previous_hash = _WAYBAR_STATE.unpack(data)
+            if previous_hash == key_hash:
+                cursor = (previous_cursor + 1) % max(span, 1)
+        os.pwrite(fd, _WAYBAR_STATE.pack(cursor, int(time.time()), key_hash), 0)
+    except OSError:
         pass
+    finally:
+        os.close(fd)
     return cursor
 
 
+@functools.cache
+def _which_cached(name: str, path: str) -> str | None:
+    return shutil.which(name, path=path)
+
+
 def run_doctor(config: AppConfig) -> None:
     checks = {
-        "mpv_found": shutil.which("mpv") is not None,
+        "mpv_found": _which_cached("mpv", os.environ.get("PATH", os.defpath)) is not None,
         "oauth_token_present": bool(config.oauth_token),
         "control_socket_path": config.control_socket_path,
         "autoplay_on_start": config.autoplay_on_start,
@@ -327,42 +335,33 @@ def run_doctor(config: AppConfig) -> None:
         "mpris_name": config.mpris_name,
         "base_url": config.base_url,
     }
-    print(json.dumps(checks, indent=2))
+    _print_json(checks, indent=True)
+
+
+async def _run_doctor_command(config: AppConfig) -> None:
+    run_doctor(config)
+
+
+CommandHandler = Callable[[AppConfig, argparse.Namespace], Awaitable[None]]
+
+_COMMANDS: dict[str, CommandHandler] = {
+    "run": lambda config, _args: run_daemon(config),
+    "recon": lambda config, _args: run_recon_command(config),
+    "doctor": lambda config, _args: _run_doctor_command(config),
+    "account": lambda config, _args: run_account_command(config),
+    "vibe": run_vibe_command,
+    "vibe-tui": lambda config, _args: run_vibe_tui(config),
+    "like": lambda config, _args: _run_track_action(config, "like"),
+    "dislike": lambda config, _args: _run_track_action(config, "dislike"),
+    "ctl": lambda config, args: run_ctl_command(config, args.action),
+    "waybar": lambda config, _args: run_waybar_command(config),
+}
 
 
 async def run(args: argparse.Namespace) -> None:
     config = load_config(args.config)
     command = args.command or "run"
-
-    if command == "run":
-        await run_daemon(config)
-        return
-    if command == "recon":
-        await run_recon_command(config)
-        return
-    if command == "doctor":
-        run_doctor(config)
-        return
-    if command == "account":
-        await run_account_command(config)
-        return
-    if command == "vibe":
-        await run_vibe_command(config, args)
-        return
-    if command == "vibe-tui":
-        await run_vibe_tui(config)
-        return
-    if command == "like":
-        await _run_track_action(config, "like")
-        return
-    if command == "dislike":
-        await _run_track_action(config, "dislike")
-        return
-    if command == "ctl":
-        await run_ctl_command(config, args.action)
-        return
-    if command == "waybar":
-        await run_waybar_command(config)
-        return
-
-    raise SystemExit(f"Unknown command: {command}")
+    handler = _COMMANDS.get(command)
+    if handler is None:
+        raise SystemExit(f"Unknown command: {command}")
+    await handler(config, args)
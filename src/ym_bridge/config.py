@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import functools
 import os
 from pathlib import Path
 import tomllib
+from typing import Any
 import uuid
 
 DEFAULT_CONFIG_PATH = Path.home() / ".config" / "ym-bridge" / "config.toml"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "ym-bridge"
+DEVICE_ID_CACHE_PATH = DEFAULT_CACHE_DIR / "device_id"
 
 
 @dataclass(slots=True)
@@ -49,19 +53,39 @@ class AppConfig:
 
 def load_config(path: Path | None = None) -> AppConfig:
     resolved = path or DEFAULT_CONFIG_PATH
-    if resolved.exists():
-        raw = tomllib.loads(resolved.read_text(encoding="utf-8"))
+    try:
+        stat = resolved.stat()
+    except OSError:
+        mtime_ns, size = 0, -1
     else:
-        raw = {}
+        mtime_ns, size = stat.st_mtime_ns, stat.st_size
+    return _load_config_cached(
+        str(resolved),
+        mtime_ns,
+        size,
+        os.getenv("YM_OAUTH_TOKEN"),
+        os.getenv("YM_DEVICE_ID"),
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(
+    path: str,
+    mtime_ns: int,
+    size: int,
+    env_oauth_token: str | None,
+    env_device_id: str | None,
+) -> AppConfig:
+    raw = _read_raw_config(Path(path)) if size >= 0 else {}
     app = raw.get("app", {})
     yandex = raw.get("yandex", {})
     endpoints = yandex.get("endpoints", {})
     recon = raw.get("recon", {})
 
     configured_token = str(yandex.get("oauth_token", ""))
-    oauth_token = os.getenv("YM_OAUTH_TOKEN", configured_token)
+    oauth_token = configured_token if env_oauth_token is None else env_oauth_token
     configured_device_id = str(yandex.get("device_id", "")).strip()
-    device_id = os.getenv("YM_DEVICE_ID", configured_device_id) or _default_device_id()
+    device_id = (configured_device_id if env_device_id is None else env_device_id) or _default_device_id()
     device_header = str(yandex.get("device_header", "")).strip()
     if not device_header:
         device_header = _default_device_header(device_id)
@@ -110,20 +134,44 @@ def load_config(path: Path | None = None) -> AppConfig:
     )
 
 
+def _read_raw_config(path: Path) -> dict[str, Any]:
+    with path.open("rb") as fp:
+        return tomllib.load(fp)
+
+
+@functools.cache
 def _default_device_id() -> str:
+    try:
+        cached = DEVICE_ID_CACHE_PATH.read_text(encoding="utf-8").strip()
+    except OSError:
+        cached = ""
+    if cached:
+        return cached
+
+    device_id = ""
     machine_id_path = Path("/etc/machine-id")
     if machine_id_path.exists():
         machine_id = machine_id_path.read_text(encoding="utf-8").strip()
         if machine_id:
-            return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"ym-bridge:{machine_id}"))
-    return str(uuid.uuid4())
+            device_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"ym-bridge:{machine_id}"))
+    if not device_id:
+        device_id = str(uuid.uuid4())
+
+    try:
+        DEVICE_ID_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        DEVICE_ID_CACHE_PATH.write_text(device_id, encoding="utf-8")
+    except OSError:
+        pass
+    return device_id
 
 
+@functools.cache
 def _default_device_header(device_id: str) -> str:
+    compact_id = device_id.replace("-", "")
     return (
         "os=Linux; os_version=unknown; manufacturer=Custom; model=ym-bridge; "
-        f"clid=desktop; uuid={device_id.replace('-', '')}; display_size=0; dpi=96; "
-        f"mcc=000; mnc=00; device_id={device_id.replace('-', '')}"
+        f"clid=desktop; uuid={compact_id}; display_size=0; dpi=96; "
+        f"mcc=000; mnc=00; device_id={compact_id}"
     )
 
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 from collections.abc import Awaitable, Callable
+import contextlib
 import logging
 
 from ym_bridge.models import PlayerState
@@ -18,12 +19,17 @@ class BridgeController:
         self._state = PlayerState()
         self._listeners: list[StateListener] = []
         self._task: asyncio.Task[None] | None = None
-        self._stopped = asyncio.Event()
+        self._last_emit_key: tuple[object, ...] | None = None
+        self._state_version = 0
 
     @property
     def state(self) -> PlayerState:
         return self._state
 
+    @property
+    def state_version(self) -> int:
+        return self._state_version
+
     def subscribe(self, listener: StateListener) -> None:
         self._listeners.append(listener)
 
@@ -33,9 +39,11 @@ class BridgeController:
         self._task = asyncio.create_task(self._sync_loop(), name="ym-bridge-sync")
 
     async def stop(self) -> None:
-        self._stopped.set()
-        if self._task:
-            await self._task
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
         await self._provider.close()
 
     async def play(self) -> None:
@@ -73,7 +81,8 @@ class BridgeController:
 
     async def refresh_state(self) -> PlayerState:
         updated = await self._provider.fetch_state()
-        self._state = updated
+        self._set_state(updated)
+        self._last_emit_key = _emit_key(updated)
         await self._emit_state(updated)
         return updated
 
@@ -84,20 +93,35 @@ class BridgeController:
         return self._provider.get_rotor_seeds()
 
     async def _sync_loop(self) -> None:
-        while not self._stopped.is_set():
+        while True:
             try:
                 updated = await self._provider.fetch_state()
-                self._state = updated
-                await self._emit_state(updated)
+                self._set_state(updated)
+                key = _emit_key(updated)
+                if key != self._last_emit_key:
+                    self._last_emit_key = key
+                    await self._emit_state(updated)
             except Exception as e:
                 LOGGER.exception("Failed to sync provider state", exc_info=e)
-            finally:
-                try:
-                    await asyncio.wait_for(self._stopped.wait(), timeout=self._poll_interval)
-                except TimeoutError:
-                    pass
+            await asyncio.sleep(self._poll_interval)
+
+    def _set_state(self, updated: PlayerState) -> None:
+        if updated != self._state:
+            self._state_version += 1
+        self._state = updated
 
     async def _emit_state(self, state: PlayerState) -> None:
-        if not self._listeners:
+        listeners = self._listeners
+        if not listeners:
             return
-        await asyncio.gather(*(listener(state) for listener in self._listeners), return_exceptions=True)
+        if len(listeners) == 1:
+            try:
+                await listeners[0](state)
+            except Exception as e:
+                LOGGER.exception("State listener failed", exc_info=e)
+            return
+        await asyncio.gather(*(listener(state) for listener in listeners), return_exceptions=True)
+
+
+def _emit_key(state: PlayerState) -> tuple[object, ...]:
+    return (state.status, state.track, state.position_us // 1_000_000, state.volume)
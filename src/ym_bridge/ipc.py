@@ -1,12 +1,90 @@
 from __future__ import annotations
 
 import asyncio
-import json
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+import contextlib
+from dataclasses import dataclass
+import functools
 from pathlib import Path
+import struct
 import time
-from typing import Any
+from typing import Any, cast
 
 from ym_bridge.controller import BridgeController
+from ym_bridge.serialization import dumps, loads
+
+IpcHandler = Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+FrameHandler = Callable[[bytes], Awaitable[bytes]]
+
+# Every IPC message is a JSON object prefixed with its byte length.
+FRAME_HEADER = struct.Struct("<I")
+MAX_FRAME_SIZE = 1 << 20
+
+
+@dataclass(slots=True)
+class TrackPayload:
+    id: str
+    title: str
+    artist: str
+    album: str
+    liked: bool
+
+
+@dataclass(slots=True)
+class VibePayload:
+    seeds: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class StatusPayload:
+    status: str
+    position_us: int
+    volume: float
+    vibe: VibePayload
+    track: TrackPayload
+
+
+class _IpcProtocol(asyncio.Protocol):
+    def __init__(self, handle_frame: FrameHandler) -> None:
+        self._handle_frame = handle_frame
+        self._transport: asyncio.Transport | None = None
+        self._buffer = bytearray()
+        self._pending: deque[bytes] = deque()
+        self._task: asyncio.Task[None] | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = cast(asyncio.Transport, transport)
+
+    def data_received(self, data: bytes) -> None:
+        if self._transport is None:
+            return
+        buffer = self._buffer
+        buffer += data
+        while len(buffer) >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(buffer)
+            if length > MAX_FRAME_SIZE:
+                self._transport.close()
+                return
+            end = FRAME_HEADER.size + length
+            if len(buffer) < end:
+                break
+            self._pending.append(bytes(buffer[FRAME_HEADER.size : end]))
+            del buffer[:end]
+        if self._pending and self._task is None:
+            self._task = asyncio.create_task(self._respond())
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._transport = None
+
+    async def _respond(self) -> None:
+        # Requests on one connection are answered strictly in order.
+        while self._pending and self._transport is not None:
+            response = await self._handle_frame(self._pending.popleft())
+            if self._transport is None:
+                break
+            self._transport.writelines((FRAME_HEADER.pack(len(response)), response))
+        self._task = None
 
 
 class BridgeIpcServer:
@@ -16,96 +94,105 @@ class BridgeIpcServer:
         self._server: asyncio.AbstractServer | None = None
         self._feedback_cooldown_seconds = 0.8
         self._last_feedback_at = 0.0
+        self._payload_key: tuple[int, tuple[str, ...]] | None = None
+        self._payload: StatusPayload | None = None
+        self._status_key: tuple[int, tuple[str, ...]] | None = None
+        self._status_response = b""
+        self._handlers: dict[str, IpcHandler] = {
+            "get_vibe": self._handle_get_vibe,
+            "set_vibe": self._handle_set_vibe,
+            "play": functools.partial(self._handle_transport, controller.play, False),
+            "pause": functools.partial(self._handle_transport, controller.pause, False),
+            "play_pause": functools.partial(self._handle_transport, controller.play_pause, True),
+            "next": functools.partial(self._handle_transport, controller.next, True),
+            "previous": functools.partial(self._handle_transport, controller.previous, True),
+            "like": functools.partial(self._handle_feedback, controller.like_current),
+            "dislike": functools.partial(self._handle_feedback, controller.dislike_current),
+        }
 
     async def start(self) -> None:
         self._socket_path.unlink(missing_ok=True)
-        self._server = await asyncio.start_unix_server(
-            self._handle_client,
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_unix_server(
+            lambda: _IpcProtocol(self._handle_frame),
             path=str(self._socket_path),
         )
 
     async def stop(self) -> None:
         if self._server:
             self._server.close()
+            # Clients keep their connection open between requests; wait_closed() would wait for them to hang up.
+            self._server.close_clients()
             await self._server.wait_closed()
             self._server = None
         self._socket_path.unlink(missing_ok=True)
 
-    async def _handle_client(
-        self,
-        reader: asyncio.StreamReader,
-        writer: asyncio.StreamWriter,
-    ) -> None:
+    async def _handle_frame(self, body: bytes) -> bytes:
         try:
-            line = await reader.readline()
-            if not line:
-                return
-            request = json.loads(line.decode("utf-8"))
+            request = loads(body)
             response = await self._dispatch(request)
         except Exception as exc:  # noqa: BLE001
-            response = {"ok": False, "error": str(exc)}
-        writer.write((json.dumps(response) + "\n").encode("utf-8"))
-        await writer.drain()
-        writer.close()
-        await writer.wait_closed()
+            return dumps({"ok": False, "error": str(exc)})
+        if "request_id" in request:
+            # Responses are always compact JSON objects, so the id can be spliced in before the closing brace.
+            response = response[:-1] + b',"request_id":' + dumps(request["request_id"]) + b"}"
+        return response
 
-    async def _dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+    async def _dispatch(self, request: dict[str, Any]) -> bytes:
         action = str(request.get("action", "")).strip()
         if action == "status":
-            return {"ok": True, "state": self._state_payload()}
-        if action == "get_vibe":
-            return {"ok": True, "seeds": list(self._controller.get_rotor_seeds())}
-        if action == "set_vibe":
-            raw_seeds = request.get("seeds", [])
-            if not isinstance(raw_seeds, list):
-                return {"ok": False, "error": "seeds must be a list"}
-            seeds = tuple(str(seed) for seed in raw_seeds)
-            await self._controller.set_rotor_seeds(seeds)
+            return self._status_bytes()
+        handler = self._handlers.get(action)
+        if handler is None:
+            return dumps({"ok": False, "error": f"unknown action: {action}"})
+        return dumps(await handler(request))
+
+    def _status_bytes(self) -> bytes:
+        key = (self._controller.state_version, self._controller.get_rotor_seeds())
+        if key != self._status_key:
+            self._status_response = dumps({"ok": True, "state": self._state_payload()})
+            self._status_key = key
+        return self._status_response
+
+    async def _handle_get_vibe(self, _request: dict[str, Any]) -> dict[str, Any]:
+        return {"ok": True, "seeds": self._controller.get_rotor_seeds()}
+
+    async def _handle_set_vibe(self, request: dict[str, Any]) -> dict[str, Any]:
+        raw_seeds = request.get("seeds", [])
+        if not isinstance(raw_seeds, list):
+            return {"ok": False, "error": "seeds must be a list"}
+        seeds = tuple(str(seed) for seed in raw_seeds)
+        await self._controller.set_rotor_seeds(seeds)
+        await self._controller.refresh_state()
+        return {
+            "ok": True,
+            "seeds": self._controller.get_rotor_seeds(),
+            "state": self._state_payload(),
+        }
+
+    async def _handle_transport(
+        self,
+        action: Callable[[], Awaitable[None]],
+        refresh: bool,
+        _request: dict[str, Any],
+    ) -> dict[str, Any]:
+        await action()
+        if refresh:
             await self._controller.refresh_state()
+        return {"ok": True, "state": self._state_payload()}
+
+    async def _handle_feedback(
+        self,
+        action: Callable[[], Awaitable[None]],
+        request: dict[str, Any],
+    ) -> dict[str, Any]:
+        if self._feedback_rate_limited():
             return {
                 "ok": True,
-                "seeds": list(self._controller.get_rotor_seeds()),
+                "skipped": "rate_limited",
                 "state": self._state_payload(),
             }
-        if action == "play":
-            await self._controller.play()
-            return {"ok": True, "state": self._state_payload()}
-        if action == "pause":
-            await self._controller.pause()
-            return {"ok": True, "state": self._state_payload()}
-        if action == "play_pause":
-            await self._controller.play_pause()
-            await self._controller.refresh_state()
-            return {"ok": True, "state": self._state_payload()}
-        if action == "next":
-            await self._controller.next()
-            await self._controller.refresh_state()
-            return {"ok": True, "state": self._state_payload()}
-        if action == "previous":
-            await self._controller.previous()
-            await self._controller.refresh_state()
-            return {"ok": True, "state": self._state_payload()}
-        if action == "like":
-            if self._feedback_rate_limited():
-                return {
-                    "ok": True,
-                    "skipped": "rate_limited",
-                    "state": self._state_payload(),
-                }
-            await self._controller.like_current()
-            await self._controller.refresh_state()
-            return {"ok": True, "state": self._state_payload()}
-        if action == "dislike":
-            if self._feedback_rate_limited():
-                return {
-                    "ok": True,
-                    "skipped": "rate_limited",
-                    "state": self._state_payload(),
-                }
-            await self._controller.dislike_current()
-            await self._controller.refresh_state()
-            return {"ok": True, "state": self._state_payload()}
-        return {"ok": False, "error": f"unknown action: {action}"}
+        return await self._handle_transport(action, True, request)
 
     def _feedback_rate_limited(self) -> bool:
         now = time.monotonic()
@@ -114,38 +201,138 @@ class BridgeIpcServer:
         self._last_feedback_at = now
         return False
 
-    def _state_payload(self) -> dict[str, Any]:
+    def _state_payload(self) -> StatusPayload:
+        seeds = self._controller.get_rotor_seeds()
+        key = (self._controller.state_version, seeds)
+        if self._payload is not None and key == self._payload_key:
+            return self._payload
+
         state = self._controller.state
-        return {
-            "status": state.status.value,
-            "position_us": state.position_us,
-            "volume": state.volume,
-            "vibe": {
-                "seeds": list(self._controller.get_rotor_seeds()),
-            },
-            "track": {
-                "id": state.track.track_id,
-                "title": state.track.title,
-                "artist": state.track.artist,
-                "album": state.track.album,
-                "liked": state.track.liked,
-            },
-        }
+        track = state.track
+        self._payload = StatusPayload(
+            status=state.status.value,
+            position_us=state.position_us,
+            volume=state.volume,
+            vibe=VibePayload(seeds=seeds),
+            track=TrackPayload(
+                id=track.track_id,
+                title=track.title,
+                artist=track.artist,
+                album=track.album,
+                liked=track.liked,
+            ),
+        )
+        self._payload_key = key
+        return self._payload
+
+
+class BridgeIpcClient:
+    def __init__(self, socket_path: str) -> None:
+        self._socket_path = socket_path
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+        self._request_id = 0
+
+    async def __aenter__(self) -> BridgeIpcClient:
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        await self.close()
+
+    async def call(self, action: str, **payload: Any) -> dict[str, Any]:
+        async with self._lock:
+            self._request_id += 1
+            body = dumps({"action": action, "request_id": self._request_id, **payload})
+            frame = (FRAME_HEADER.pack(len(body)), body)
+            # A kept-open connection may have been dropped by a daemon restart while idle; if nothing came back on it,
+            # the request is sent once more on a fresh connection.
+            retry = self._writer is not None
+            while True:
+                if self._reader is None or self._writer is None:
+                    try:
+                        self._reader, self._writer = await asyncio.open_unix_connection(self._socket_path)
+                    except FileNotFoundError:
+                        return {"ok": False, "error": "daemon socket not found"}
+                    except OSError as exc:
+                        return {"ok": False, "error": str(exc)}
+                try:
+                    self._writer.writelines(frame)
+                    await self._writer.drain()
+                    header = await self._reader.readexactly(FRAME_HEADER.size)
+                except asyncio.IncompleteReadError as exc:
+                    await self._disconnect()
+                    if retry and not exc.partial:
+                        retry = False
+                        continue
+                    return {"ok": False, "error": "empty response"}
+                except OSError as exc:
+                    await self._disconnect()
+                    if retry:
+                        retry = False
+                        continue
+                    return {"ok": False, "error": str(exc)}
+                break
+
+            try:
+                (length,) = FRAME_HEADER.unpack(header)
+                response = loads(await self._reader.readexactly(length))
+            except asyncio.IncompleteReadError:
+                await self._disconnect()
+                return {"ok": False, "error": "empty response"}
+            except OSError as exc:
+                await self._disconnect()
+                return {"ok": False, "error": str(exc)}
+            response.pop("request_id", None)
+            return response
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._disconnect()
+
+    async def _disconnect(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
 
 
 async def send_ipc(socket_path: str, action: str, **payload: Any) -> dict[str, Any]:
+    (response,) = await send_ipc_many(socket_path, [{"action": action, **payload}])
+    return response
+
+
+async def send_ipc_many(socket_path: str, requests: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
     try:
         reader, writer = await asyncio.open_unix_connection(socket_path)
     except FileNotFoundError:
-        return {"ok": False, "error": "daemon socket not found"}
+        return [{"ok": False, "error": "daemon socket not found"} for _ in requests]
     except OSError as exc:
-        return {"ok": False, "error": str(exc)}
-    request = {"action": action, **payload}
-    writer.write((json.dumps(request) + "\n").encode("utf-8"))
-    await writer.drain()
-    line = await reader.readline()
-    writer.close()
-    await writer.wait_closed()
-    if not line:
-        return {"ok": False, "error": "empty response"}
-    return json.loads(line.decode("utf-8"))
+        return [{"ok": False, "error": str(exc)} for _ in requests]
+
+    frames = bytearray()
+    for request in requests:
+        body = dumps(request)
+        frames += FRAME_HEADER.pack(len(body))
+        frames += body
+    writer.write(frames)
+    responses: list[dict[str, Any]] = []
+    try:
+        await writer.drain()
+        for _ in requests:
+            responses.append(await _read_frame(reader))
+    except asyncio.IncompleteReadError:
+        responses.extend({"ok": False, "error": "empty response"} for _ in range(len(requests) - len(responses)))
+    except OSError as exc:
+        responses.extend({"ok": False, "error": str(exc)} for _ in range(len(requests) - len(responses)))
+    finally:
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+    return responses
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> dict[str, Any]:
+    (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return loads(await reader.readexactly(length))
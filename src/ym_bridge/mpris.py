@@ -8,9 +8,13 @@ from dbus_next.constants import BusType, PropertyAccess
 from dbus_next.service import ServiceInterface, dbus_property, method, signal
 
 from ym_bridge.controller import BridgeController
-from ym_bridge.models import PlayerState
+from ym_bridge.models import PlayerState, Track
 
 OBJECT_PATH = "/org/mpris/MediaPlayer2"
+EMIT_DELAY_SECONDS = 0.05
+SUPPORTED_URI_SCHEMES = ["https"]
+SUPPORTED_MIME_TYPES = ["audio/mpeg", "audio/aac"]
+_NO_ARTIST = Variant("as", [])
 
 
 class MediaPlayer2Interface(ServiceInterface):
@@ -48,17 +52,21 @@ class MediaPlayer2Interface(ServiceInterface):
 
     @dbus_property(access=PropertyAccess.READ)
     def SupportedUriSchemes(self) -> "as":
-        return ["https"]
+        return SUPPORTED_URI_SCHEMES
 
     @dbus_property(access=PropertyAccess.READ)
     def SupportedMimeTypes(self) -> "as":
-        return ["audio/mpeg", "audio/aac"]
+        return SUPPORTED_MIME_TYPES
 
 
 class MediaPlayer2PlayerInterface(ServiceInterface):
     def __init__(self, controller: BridgeController) -> None:
         super().__init__("org.mpris.MediaPlayer2.Player")
         self._controller = controller
+        self._metadata_key: tuple[object, ...] | None = None
+        self._metadata: dict[str, Variant] = {}
+        self._pending_volume: float | None = None
+        self._volume_task: asyncio.Task[None] | None = None
 
     @method()
     async def Next(self) -> "":
@@ -126,7 +134,10 @@ class MediaPlayer2PlayerInterface(ServiceInterface):
 
     @Volume.setter
     def Volume(self, volume: "d") -> None:
-        asyncio.create_task(self._controller.set_volume(float(volume)))
+        # Slider drags write many values; only the latest one still pending is applied.
+        self._pending_volume = float(volume)
+        if self._volume_task is None:
+            self._volume_task = asyncio.create_task(self._apply_volume())
 
     @dbus_property(access=PropertyAccess.READ)
     def Position(self) -> "x":
@@ -166,12 +177,26 @@ class MediaPlayer2PlayerInterface(ServiceInterface):
 
     @dbus_property(access=PropertyAccess.READ)
     def Metadata(self) -> "a{sv}":
-        track = self._controller.state.track
+        return self.metadata_for(self._controller.state.track)
+
+    async def _apply_volume(self) -> None:
+        try:
+            while self._pending_volume is not None:
+                volume, self._pending_volume = self._pending_volume, None
+                await self._controller.set_volume(volume)
+        finally:
+            self._volume_task = None
+
+    def metadata_for(self, track: Track) -> dict[str, Variant]:
+        key = (track.track_id, track.title, track.artist, track.album, track.length_ms, track.art_url, track.url)
+        if key == self._metadata_key:
+            return self._metadata
+
         track_obj = f"{OBJECT_PATH}/track/{track.track_id or 'none'}"
         metadata: dict[str, Variant] = {
             "mpris:trackid": Variant("o", track_obj),
             "xesam:title": Variant("s", track.title),
-            "xesam:artist": Variant("as", [track.artist] if track.artist else []),
+            "xesam:artist": Variant("as", [track.artist]) if track.artist else _NO_ARTIST,
             "xesam:album": Variant("s", track.album),
             "mpris:length": Variant("x", track.length_ms * 1000),
         }
@@ -179,6 +204,8 @@ class MediaPlayer2PlayerInterface(ServiceInterface):
             metadata["mpris:artUrl"] = Variant("s", track.art_url)
         if track.url:
             metadata["xesam:url"] = Variant("s", track.url)
+        self._metadata_key = key
+        self._metadata = metadata
         return metadata
 
 
@@ -189,6 +216,10 @@ class BridgeMprisService:
         self._bus: MessageBus | None = None
         self._root = MediaPlayer2Interface(controller)
         self._player = MediaPlayer2PlayerInterface(controller)
+        self._pending_state: PlayerState | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._root_emitted: dict[str, object] = {}
+        self._player_emitted: dict[str, object] = {}
 
     async def start(self) -> None:
         self._bus = await MessageBus(bus_type=BusType.SESSION).connect()
@@ -198,20 +229,35 @@ class BridgeMprisService:
         self._controller.subscribe(self.on_state_changed)
 
     async def stop(self) -> None:
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
         if self._bus:
             self._bus.disconnect()
 
     async def on_state_changed(self, state: PlayerState) -> None:
-        self._root.emit_properties_changed(
+        self._pending_state = state
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(EMIT_DELAY_SECONDS, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        state, self._pending_state = self._pending_state, None
+        if state is None:
+            return
+        _emit_changed(
+            self._root,
+            self._root_emitted,
             {
                 "CanQuit": state.can_quit,
                 "CanRaise": state.can_raise,
                 "Identity": state.identity,
                 "DesktopEntry": state.desktop_entry,
             },
-            [],
         )
-        self._player.emit_properties_changed(
+        _emit_changed(
+            self._player,
+            self._player_emitted,
             {
                 "PlaybackStatus": state.status.value,
                 "Volume": state.volume,
@@ -222,7 +268,13 @@ class BridgeMprisService:
                 "CanPause": state.can_pause,
                 "CanSeek": state.can_seek,
                 "CanControl": state.can_control,
-                "Metadata": self._player.Metadata,
+                "Metadata": self._player.metadata_for(state.track),
             },
-            [],
         )
+
+
+def _emit_changed(interface: ServiceInterface, emitted: dict[str, object], properties: dict[str, object]) -> None:
+    changed = {name: value for name, value in properties.items() if name not in emitted or emitted[name] != value}
+    if changed:
+        emitted.update(changed)
+        interface.emit_properties_changed(changed, [])
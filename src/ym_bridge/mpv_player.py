@@ -1,52 +1,67 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import contextlib
 from pathlib import Path
-import subprocess
 import tempfile
 
+from ym_bridge.serialization import dumps, loads
+
+_STATE_PROPERTIES = ("pause", "time-pos", "idle-active", "volume")
+_STATE_QUERIES = [["get_property", name] for name in _STATE_PROPERTIES]
+_SOCKET_TIMEOUT_SECONDS = 5.0
+
 
 class MpvPlayer:
     def __init__(self) -> None:
         self._socket_path = Path(tempfile.gettempdir()) / f"ym-bridge-mpv-{id(self)}.sock"
-        self._process: subprocess.Popen[bytes] | None = None
+        self._process: asyncio.subprocess.Process | None = None
         self._reader: asyncio.StreamReader | None = None
         self._writer: asyncio.StreamWriter | None = None
-        self._lock = asyncio.Lock()
+        self._reader_task: asyncio.Task[None] | None = None
+        self._pending: dict[int, tuple[asyncio.Future[dict], list[object]]] = {}
+        self._properties: dict[str, object] = {}
+        self._properties_stale = True
+        self._command_generation = 0
         self._request_id = 1
 
     async def start(self) -> None:
-        if self._process and self._process.poll() is None and self._reader and self._writer:
+        if self._process and self._process.returncode is None and self._reader and self._writer:
             return
 
         if self._socket_path.exists():
             self._socket_path.unlink(missing_ok=True)
 
-        self._process = subprocess.Popen(
-            [
-                "mpv",
-                "--idle=yes",
-                "--no-terminal",
-                f"--input-ipc-server={self._socket_path}",
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+        self._process = await asyncio.create_subprocess_exec(
+            "mpv",
+            "--idle=yes",
+            "--no-terminal",
+            f"--input-ipc-server={self._socket_path}",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
         )
 
-        for _ in range(100):
-            if self._socket_path.exists():
-                break
-            await asyncio.sleep(0.05)
-        else:
-            raise RuntimeError("mpv IPC socket did not appear")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + _SOCKET_TIMEOUT_SECONDS
+        delay = 0.005
+        while not self._socket_path.exists():
+            if self._process.returncode is not None or loop.time() >= deadline:
+                raise RuntimeError("mpv IPC socket did not appear")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
 
+        await self._stop_reader()
         self._reader, self._writer = await asyncio.open_unix_connection(str(self._socket_path))
+        self._properties = {}
+        self._properties_stale = True
+        self._reader_task = asyncio.create_task(self._read_loop(self._reader), name="ym-bridge-mpv-reader")
+        await self._commands_batch(
+            [["observe_property", index, name] for index, name in enumerate(_STATE_PROPERTIES, start=1)]
+        )
 
     async def load(self, url: str, *, paused: bool = False) -> None:
         await self.start()
-        await self._command(["loadfile", url, "replace"])
-        await self._command(["set_property", "pause", paused])
+        await self._command(["loadfile", url, "replace"], ["set_property", "pause", paused])
 
     async def play(self) -> None:
         await self.start()
@@ -86,10 +101,11 @@ class MpvPlayer:
                 "volume": 100.0,
             }
 
-        pause = await self._get_property("pause")
-        time_pos = await self._get_property("time-pos")
-        idle_active = await self._get_property("idle-active")
-        volume = await self._get_property("volume")
+        if self._properties_stale:
+            self._properties_stale = False
+            await self._commands_batch(_STATE_QUERIES)
+
+        pause, time_pos, idle_active, volume = (self._properties.get(name) for name in _STATE_PROPERTIES)
         return {
             "pause": bool(pause) if pause is not None else True,
             "time-pos": float(time_pos) if time_pos is not None else 0.0,
@@ -98,36 +114,86 @@ class MpvPlayer:
         }
 
     async def close(self) -> None:
+        await self._stop_reader()
         if self._writer:
             self._writer.close()
             await self._writer.wait_closed()
             self._reader = None
             self._writer = None
-        if self._process and self._process.poll() is None:
+        if self._process and self._process.returncode is None:
             self._process.terminate()
-            self._process.wait(timeout=3)
+            try:
+                await asyncio.wait_for(self._process.wait(), timeout=3)
+            except TimeoutError:
+                self._process.kill()
+                await self._process.wait()
         self._process = None
         self._socket_path.unlink(missing_ok=True)
 
-    async def _get_property(self, name: str):
-        result = await self._command(["get_property", name])
-        return result.get("data")
-
-    async def _command(self, command: list[object]) -> dict:
+    async def _command(self, *commands: list[object]) -> list[dict]:
+        # The state properties are read back in the same round-trip, so state() can answer from the cache.
+        self._command_generation += 1
+        generation = self._command_generation
+        self._properties_stale = True
+        responses = await self._commands_batch([*commands, *_STATE_QUERIES])
+        if generation == self._command_generation:
+            self._properties_stale = False
+        return responses[: len(commands)]
+
+    async def _commands_batch(self, commands: list[list[object]]) -> list[dict]:
         if not self._writer or not self._reader:
             raise RuntimeError("mpv IPC is not connected")
-
-        async with self._lock:
+        # Only the reader resolves pending futures; without it they would never complete.
+        if self._reader_task is None or self._reader_task.done():
+            raise RuntimeError("mpv IPC closed")
+
+        loop = asyncio.get_running_loop()
+        request_ids: list[int] = []
+        futures: list[asyncio.Future[dict]] = []
+        frames: list[bytes] = []
+        for command in commands:
             request_id = self._request_id
             self._request_id += 1
-            payload = {"command": command, "request_id": request_id}
-            self._writer.write((json.dumps(payload) + "\n").encode("utf-8"))
+            future: asyncio.Future[dict] = loop.create_future()
+            self._pending[request_id] = (future, command)
+            request_ids.append(request_id)
+            futures.append(future)
+            frames.append(dumps({"command": command, "request_id": request_id}) + b"\n")
+
+        try:
+            self._writer.write(b"".join(frames))
             await self._writer.drain()
-
-            while True:
-                line = await self._reader.readline()
-                if not line:
-                    raise RuntimeError("mpv IPC closed")
-                message = json.loads(line.decode("utf-8"))
-                if message.get("request_id") == request_id:
-                    return message
+        except BaseException:
+            for request_id in request_ids:
+                self._pending.pop(request_id, None)
+            raise
+        return list(await asyncio.gather(*futures))
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while line := await reader.readline():
+                message = loads(line)
+                request_id = message.get("request_id")
+                if request_id is not None:
+                    future, command = self._pending.pop(request_id, (None, None))
+                    if future is None or future.done():
+                        continue
+                    if command[0] == "get_property" and message.get("error") == "success":
+                        self._properties[str(command[1])] = message.get("data")
+                    future.set_result(message)
+                elif message.get("event") == "property-change":
+                    self._properties[str(message.get("name"))] = message.get("data")
+        finally:
+            self._properties_stale = True
+            pending, self._pending = self._pending, {}
+            for future, _ in pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("mpv IPC closed"))
+
+    async def _stop_reader(self) -> None:
+        if self._reader_task is None:
+            return
+        self._reader_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await self._reader_task
+        self._reader_task = None
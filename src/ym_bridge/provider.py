@@ -6,6 +6,8 @@ from ym_bridge.models import PlayerState
 
 
 class MusicProvider(Protocol):
+    __slots__ = ()
+
     async def fetch_state(self) -> PlayerState: ...
 
     async def play(self) -> None: ...
@@ -1,21 +1,61 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
+import functools
 import hashlib
+import importlib.util
 import logging
+import os
+import time
+from types import MappingProxyType
 from typing import Any
-import uuid
-import xml.etree.ElementTree as ET
 
 import httpx
 
+try:
+    from lxml import etree as ET
+
+    _XML_PARSER = ET.XMLParser(resolve_entities=False, no_network=True)
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+    _XML_PARSER = None
+
 from ym_bridge.models import PlaybackStatus, PlayerState, Track
 from ym_bridge.mpv_player import MpvPlayer
 from ym_bridge.provider import MusicProvider
+from ym_bridge.serialization import loads
 
 LOGGER = logging.getLogger(__name__)
 SIGN_SALT = "XGRlBW9FXlekgbPrRHuSiA"
+DEFAULT_FEEDBACK_FROM = "radio-mobile-user-onyourwave-default"
+_SIGN_SALT_BYTES = SIGN_SALT.encode("utf-8")
+HTTP_TIMEOUT = httpx.Timeout(20.0, connect=5.0, write=10.0, pool=5.0)
+# Feedback and plays reports arrive in bursts; keep connections warm between them.
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Track dicts come straight from API JSON; the computed queue ref is memoized on them under this key.
+_QUEUE_REF_KEY = "_ym_bridge_queue_ref"
+# Sequence items also memoize their derived Track; _set_current_liked drops it.
+_TRACK_KEY = "_ym_bridge_track"
+# Download-info codecs in order of preference; the first entry of the response is used when none match.
+_CODEC_PREFERENCE = ("mp3",)
+_CODEC_RANK = {codec: rank for rank, codec in enumerate(_CODEC_PREFERENCE)}
+# A 401 from /account/about is answered from cache for this long before the lookup is tried again.
+_ACCOUNT_UID_ERROR_TTL_SECONDS = 300.0
+
+# Returned on every poll while no OAuth token is configured; callers never mutate states.
+_DEMO_STATE = PlayerState(
+    status=PlaybackStatus.PAUSED,
+    track=Track(track_id="demo", title="Connect Yandex account", artist="ym-bridge"),
+    can_control=False,
+    can_seek=False,
+    can_go_next=False,
+    can_go_previous=False,
+)
 
 
 class ReverseEngineeringRequiredError(RuntimeError):
@@ -55,43 +95,79 @@ class YandexClientConfig:
 
 
 class YandexMusicProvider(MusicProvider):
+    __slots__ = (
+        "_account_uid",
+        "_account_uid_error",
+        "_account_uid_error_at",
+        "_account_uid_task",
+        "_base_params",
+        "_config",
+        "_context_item",
+        "_dislikes_add_endpoint",
+        "_feedback_endpoint",
+        "_feedback_from",
+        "_http",
+        "_index",
+        "_likes_add_endpoint",
+        "_likes_remove_endpoint",
+        "_play_id",
+        "_play_start_timestamp",
+        "_player",
+        "_queue_refs_cache",
+        "_reported_finish_play_id",
+        "_rotor_seeds",
+        "_seeds_generation",
+        "_sequence",
+        "_sequence_task",
+        "_session_batch_id",
+        "_session_id",
+    )
+
     def __init__(self, config: YandexClientConfig) -> None:
         self._config = config
-        headers = {
-            "Accept": "application/json",
-            "Accept-Language": config.accept_language,
-            "User-Agent": config.user_agent,
-            "X-Yandex-Music-Client": config.music_client,
-            "X-Yandex-Music-Content-Type": config.content_type,
-            "X-Yandex-Music-Device": config.device_header,
-        }
-        if config.oauth_token:
-            headers["Authorization"] = f"OAuth {config.oauth_token}"
-
-        self._http = httpx.AsyncClient(base_url=config.base_url, headers=headers, timeout=20)
+        self._http = httpx.AsyncClient(
+            base_url=config.base_url,
+            headers=api_headers(
+                accept_language=config.accept_language,
+                user_agent=config.user_agent,
+                music_client=config.music_client,
+                content_type=config.content_type,
+                device_header=config.device_header,
+                oauth_token=config.oauth_token,
+            ),
+            timeout=HTTP_TIMEOUT,
+            limits=HTTP_LIMITS,
+            http2=HTTP2_AVAILABLE,
+        )
+        self._base_params: dict[str, str] = {"device-id": config.device_id} if config.device_id else {}
         self._player = MpvPlayer()
-        self._rotor_seeds: list[str] = list(config.rotor_seeds)
+        self._rotor_seeds: tuple[str, ...] = tuple(config.rotor_seeds)
         self._sequence: list[dict[str, Any]] = []
+        self._sequence_task: asyncio.Task[bool] | None = None
+        # Bumped by set_rotor_seeds so an in-flight session for the old seeds is discarded, not applied.
+        self._seeds_generation = 0
+        # Queue refs parallel to _sequence, so feedback payloads don't walk the track dicts.
+        self._queue_refs_cache: list[str] = []
         self._index = 0
         self._session_id = ""
         self._session_batch_id = ""
-        self._feedback_from = ""
+        self._feedback_endpoint = ""
+        self._feedback_from = DEFAULT_FEEDBACK_FROM
         self._context_item = "user:onyourwave"
         self._account_uid: int | None = None
+        self._account_uid_task: asyncio.Task[int] | None = None
+        self._account_uid_error: httpx.HTTPStatusError | None = None
+        self._account_uid_error_at = 0.0
+        self._likes_add_endpoint = ""
+        self._likes_remove_endpoint = ""
+        self._dislikes_add_endpoint = ""
         self._play_id = ""
         self._play_start_timestamp = ""
         self._reported_finish_play_id = ""
 
     async def fetch_state(self) -> PlayerState:
         if not self._config.oauth_token:
-            return PlayerState(
-                status=PlaybackStatus.PAUSED,
-                track=Track(track_id="demo", title="Connect Yandex account", artist="ym-bridge"),
-                can_control=False,
-                can_seek=False,
-                can_go_next=False,
-                can_go_previous=False,
-            )
+            return _DEMO_STATE
 
         if not self._sequence:
             await self._ensure_sequence(autoplay=self._config.autoplay_on_start)
@@ -101,13 +177,15 @@ class YandexMusicProvider(MusicProvider):
             finished_item = self._current_item()
             next_item = self._peek_item(1)
             played_seconds = float(runtime.get("time-pos", 0.0) or 0.0)
-            await self._report_play_finished_if_needed(played_seconds)
+            now = datetime.now().astimezone()
+            await self._report_play_finished_if_needed(played_seconds, now)
             if finished_item and next_item:
                 await self._send_finish_and_start_feedback(
-                    finished_track_id=str(finished_item.get("id", "")).strip(),
+                    finished_track_id=finished_item.get("id", ""),
                     finished_track_length_seconds=float(finished_item.get("durationMs", 0) or 0) / 1000.0,
-                    started_track_id=str(next_item.get("id", "")).strip(),
+                    started_track_id=next_item.get("id", ""),
                     total_played_seconds=played_seconds,
+                    now=now,
                 )
             await self._advance(1)
             runtime = await self._player.state()
@@ -172,27 +250,34 @@ class YandexMusicProvider(MusicProvider):
         await self._player.set_volume(volume)
 
     async def close(self) -> None:
+        for task in (self._sequence_task, self._account_uid_task):
+            if task is not None:
+                task.cancel()
         await self._player.close()
         await self._http.aclose()
 
     async def set_rotor_seeds(self, seeds: tuple[str, ...]) -> None:
-        normalized = [seed.strip() for seed in seeds if seed.strip()]
+        normalized = tuple(seed.strip() for seed in seeds if seed.strip())
         if not normalized:
             raise ReverseEngineeringRequiredError("At least one rotor seed is required")
         self._rotor_seeds = normalized
+        self._seeds_generation += 1
+        self._sequence_task = None
         await self._player.stop()
         self._sequence = []
+        self._queue_refs_cache = []
         self._index = 0
         self._session_id = ""
         self._session_batch_id = ""
-        self._feedback_from = ""
+        self._feedback_endpoint = ""
+        self._feedback_from = DEFAULT_FEEDBACK_FROM
         self._context_item = "user:onyourwave"
         self._play_id = ""
         self._play_start_timestamp = ""
         self._reported_finish_play_id = ""
 
     def get_rotor_seeds(self) -> tuple[str, ...]:
-        return tuple(self._rotor_seeds)
+        return self._rotor_seeds
 
     async def like_current(self) -> None:
         if not self._sequence:
@@ -202,17 +287,17 @@ class YandexMusicProvider(MusicProvider):
         if not item:
             raise ReverseEngineeringRequiredError("No current track to like")
 
-        track_id = str(item.get("id", ""))
+        track_id = item.get("id", "")
         queue_ref = self._track_queue_ref(item)
         if not track_id or not queue_ref:
             raise ReverseEngineeringRequiredError("Current track is missing ids required for like action")
 
-        uid = await self._ensure_account_uid()
-        timestamp = datetime.now().astimezone().isoformat(timespec="milliseconds")
-        likes_endpoint = self._config.endpoint_likes_tracks_add.format(user_id=uid)
+        await self._ensure_account_uid()
+        now = datetime.now().astimezone()
+        timestamp = now.isoformat(timespec="milliseconds")
         await self._request_json(
             "POST",
-            likes_endpoint,
+            self._likes_add_endpoint,
             json={
                 "tracks": [
                     {
@@ -221,11 +306,12 @@ class YandexMusicProvider(MusicProvider):
                     }
                 ]
             },
+            now=now,
         )
 
         await self._send_rotor_feedback(
             track_id=track_id,
-            timestamp=timestamp,
+            now=now,
             event_type="like",
         )
         self._set_current_liked(True)
@@ -238,22 +324,22 @@ class YandexMusicProvider(MusicProvider):
         if not item:
             raise ReverseEngineeringRequiredError("No current track to dislike")
 
-        track_id = str(item.get("id", "")).strip()
+        track_id = item.get("id", "")
         queue_ref = self._track_queue_ref(item)
         if not track_id:
             raise ReverseEngineeringRequiredError("Current track is missing id required for dislike action")
         if not queue_ref:
             raise ReverseEngineeringRequiredError("Current track is missing album id required for dislike action")
 
-        uid = await self._ensure_account_uid()
-        timestamp = datetime.now().astimezone().isoformat(timespec="milliseconds")
+        await self._ensure_account_uid()
+        now = datetime.now().astimezone()
+        timestamp = now.isoformat(timespec="milliseconds")
         runtime = await self._player.state()
         played_seconds = float(runtime.get("time-pos", 0.0) or 0.0)
 
-        remove_endpoint = self._config.endpoint_likes_tracks_remove.format(user_id=uid)
         await self._request_json(
             "POST",
-            remove_endpoint,
+            self._likes_remove_endpoint,
             json={
                 "tracks": [
                     {
@@ -262,12 +348,12 @@ class YandexMusicProvider(MusicProvider):
                     }
                 ]
             },
+            now=now,
         )
 
-        dislikes_endpoint = self._config.endpoint_dislikes_tracks_add.format(user_id=uid)
         await self._request_json(
             "POST",
-            dislikes_endpoint,
+            self._dislikes_add_endpoint,
             json={
                 "tracks": [
                     {
@@ -276,6 +362,7 @@ class YandexMusicProvider(MusicProvider):
                     }
                 ]
             },
+            now=now,
         )
 
         self._set_current_liked(False)
@@ -283,27 +370,30 @@ class YandexMusicProvider(MusicProvider):
             track_data=item,
             played_seconds=played_seconds,
             change_reason="dislike",
+            now=now,
         )
 
         next_item = self._peek_item(1)
         await self._advance(1)
         started_track_id = self._current_track().track_id
         if len(self._sequence) > 1 and next_item and started_track_id:
-            await self._send_dislike_and_start_feedback(
-                disliked_track_id=track_id,
+            await self._send_interrupt_and_start_feedback(
+                interrupted_track_id=track_id,
                 started_track_id=started_track_id,
                 total_played_seconds=played_seconds,
+                event_type="dislike",
+                now=datetime.now().astimezone(),
             )
             return
 
         await self._send_rotor_feedback(
             track_id=track_id,
-            timestamp=timestamp,
+            now=now,
             event_type="dislike",
         )
 
     async def fetch_account_about(self) -> dict[str, Any]:
-        payload = await self._request_json("GET", self._config.endpoint_account_about)
+        payload = await self._request_json("GET", self._config.endpoint_account_about, needs_request_id=False)
         result = payload.get("result") if isinstance(payload, dict) else None
         if isinstance(result, dict):
             return result
@@ -312,6 +402,23 @@ class YandexMusicProvider(MusicProvider):
     async def _ensure_sequence(self, autoplay: bool | None = None) -> None:
         if self._sequence:
             return
+        # Concurrent callers share one /rotor/session/new request; the first caller's autoplay wins.
+        # A session discarded because the seeds changed meanwhile is retried with the new seeds.
+        while not self._sequence:
+            task = self._sequence_task
+            if task is None:
+                task = asyncio.ensure_future(self._start_sequence(autoplay))
+                self._sequence_task = task
+                task.add_done_callback(self._clear_sequence_task)
+            if await asyncio.shield(task):
+                return
+
+    def _clear_sequence_task(self, task: asyncio.Task[bool]) -> None:
+        if self._sequence_task is task:
+            self._sequence_task = None
+
+    async def _start_sequence(self, autoplay: bool | None) -> bool:
+        generation = self._seeds_generation
         payload = {
             "includeTracksInResponse": True,
             "includeWaveModel": True,
@@ -319,9 +426,12 @@ class YandexMusicProvider(MusicProvider):
             "seeds": list(self._rotor_seeds),
         }
         data = await self._request_json("POST", self._config.endpoint_rotor_session_new, json=payload)
+        if generation != self._seeds_generation:
+            return False
         result = data.get("result", {})
         self._session_id = str(result.get("radioSessionId", ""))
         self._session_batch_id = str(result.get("batchId", ""))
+        self._feedback_endpoint = self._config.endpoint_rotor_session_tracks.format(session_id=self._session_id)
         wave = result.get("wave", {})
         if isinstance(wave, dict):
             from_id = str(wave.get("idForFrom", "")).strip()
@@ -334,9 +444,11 @@ class YandexMusicProvider(MusicProvider):
         if not isinstance(sequence, list) or not sequence:
             raise ReverseEngineeringRequiredError("Rotor session returned empty sequence")
         self._sequence = [item for item in sequence if isinstance(item, dict)]
+        self._queue_refs_cache = [self._index_sequence_item(item) for item in self._sequence]
         self._index = 0
         should_autoplay = self._config.autoplay_on_start if autoplay is None else autoplay
         await self._play_current(paused=not should_autoplay)
+        return True
 
     async def _advance(self, delta: int, send_skip_feedback: bool = False) -> None:
         if not self._sequence:
@@ -346,25 +458,29 @@ class YandexMusicProvider(MusicProvider):
         previous_item = self._current_item()
         runtime = await self._player.state()
         played_seconds = float(runtime.get("time-pos", 0.0) or 0.0)
+        now = datetime.now().astimezone()
 
         if send_skip_feedback and previous_item:
             await self._report_play_event(
                 track_data=previous_item,
                 played_seconds=played_seconds,
                 change_reason="skip",
+                now=now,
             )
 
         self._index = (self._index + delta) % len(self._sequence)
 
         current_item = self._current_item()
         if send_skip_feedback and previous_item and current_item:
-            previous_track_id = str(previous_item.get("id", "")).strip()
-            current_track_id = str(current_item.get("id", "")).strip()
+            previous_track_id = previous_item.get("id", "")
+            current_track_id = current_item.get("id", "")
             if previous_track_id and current_track_id:
-                await self._send_skip_and_start_feedback(
-                    skipped_track_id=previous_track_id,
+                await self._send_interrupt_and_start_feedback(
+                    interrupted_track_id=previous_track_id,
                     started_track_id=current_track_id,
                     total_played_seconds=played_seconds,
+                    event_type="skip",
+                    now=datetime.now().astimezone(),
                 )
 
         await self._play_current()
@@ -395,9 +511,9 @@ class YandexMusicProvider(MusicProvider):
         if not isinstance(sequence, list):
             return
 
-        for item in sequence:
-            if isinstance(item, dict):
-                self._sequence.append(item)
+        items = [item for item in sequence if isinstance(item, dict)]
+        self._sequence.extend(items)
+        self._queue_refs_cache.extend(self._index_sequence_item(item) for item in items)
 
     def _current_item(self) -> dict[str, Any] | None:
         if not self._sequence:
@@ -422,63 +538,78 @@ class YandexMusicProvider(MusicProvider):
         return track_data
 
     def _track_queue_ref(self, track_data: dict[str, Any]) -> str:
-        track_id = str(track_data.get("id", "")).strip()
-        albums = track_data.get("albums", [])
-        if not track_id or not isinstance(albums, list) or not albums:
-            return ""
-        first = albums[0]
-        if not isinstance(first, dict):
-            return ""
-        album_id = str(first.get("id", "")).strip()
-        if not album_id:
+        cached = track_data.get(_QUEUE_REF_KEY)
+        if isinstance(cached, str):
+            return cached
+        ref = _build_queue_ref(track_data)
+        track_data[_QUEUE_REF_KEY] = ref
+        return ref
+
+    def _index_sequence_item(self, item: dict[str, Any]) -> str:
+        track_data = item.get("track")
+        if not isinstance(track_data, dict):
             return ""
-        return f"{track_id}:{album_id}"
+        # Normalized once here so lookups can use the id as-is.
+        track_data["id"] = str(track_data.get("id", "")).strip()
+        return self._track_queue_ref(track_data)
 
     def _queue_refs(self, limit: int, start_offset: int = 0) -> list[str]:
-        if not self._sequence:
-            return []
-        refs: list[str] = []
-        total = len(self._sequence)
-        for offset in range(min(limit, total)):
-            item = self._sequence[(self._index + start_offset + offset) % total]
-            if not isinstance(item, dict):
-                continue
-            track_data = item.get("track")
-            if not isinstance(track_data, dict):
-                continue
-            ref = self._track_queue_ref(track_data)
-            if ref:
-                refs.append(ref)
-        return refs
+        refs = self._queue_refs_cache
+        total = len(refs)
+        start = self._index + start_offset
+        return [ref for ref in (refs[(start + offset) % total] for offset in range(min(limit, total))) if ref]
 
     async def _ensure_account_uid(self) -> int:
         if self._account_uid is not None:
             return self._account_uid
-        account = await self.fetch_account_about()
+        if self._account_uid_error is not None:
+            if time.monotonic() - self._account_uid_error_at < _ACCOUNT_UID_ERROR_TTL_SECONDS:
+                raise ReverseEngineeringRequiredError(
+                    "Account lookup was rejected (401); check the OAuth token"
+                ) from self._account_uid_error
+            self._account_uid_error = None
+        task = self._account_uid_task
+        if task is None:
+            task = asyncio.ensure_future(self._resolve_account_uid())
+            self._account_uid_task = task
+            task.add_done_callback(self._clear_account_uid_task)
+        return await asyncio.shield(task)
+
+    def _clear_account_uid_task(self, task: asyncio.Task[int]) -> None:
+        if self._account_uid_task is task:
+            self._account_uid_task = None
+
+    async def _resolve_account_uid(self) -> int:
+        try:
+            account = await self.fetch_account_about()
+        except httpx.HTTPStatusError as exc:
+            # The OAuth token is fixed for the provider's lifetime, so a rejection is not retried for a while.
+            if exc.response.status_code == 401:
+                self._account_uid_error = exc
+                self._account_uid_error_at = time.monotonic()
+            raise
         uid = account.get("uid")
         if not isinstance(uid, int):
             raise ReverseEngineeringRequiredError("Could not resolve account uid for likes endpoint")
         self._account_uid = uid
+        self._likes_add_endpoint = self._config.endpoint_likes_tracks_add.format(user_id=uid)
+        self._likes_remove_endpoint = self._config.endpoint_likes_tracks_remove.format(user_id=uid)
+        self._dislikes_add_endpoint = self._config.endpoint_dislikes_tracks_add.format(user_id=uid)
         return uid
 
-    async def _send_rotor_feedback(self, *, track_id: str, timestamp: str, event_type: str) -> None:
+    async def _send_rotor_feedback(self, *, track_id: str, now: datetime, event_type: str) -> None:
         if not self._session_id:
             return
+        event = {
+            "timestamp": now.isoformat(timespec="milliseconds"),
+            "trackId": track_id,
+            "type": event_type,
+        }
         feedback_payload = {
-            "feedbacks": [
-                {
-                    "batchId": self._session_batch_id or f"{uuid.uuid4()}.local",
-                    "event": {
-                        "timestamp": timestamp,
-                        "trackId": track_id,
-                        "type": event_type,
-                    },
-                    "from": self._feedback_from or "radio-mobile-user-onyourwave-default",
-                }
-            ],
+            "feedbacks": [self._feedback_entry(self._feedback_batch_id(), event)],
             "queue": self._queue_refs(limit=2),
         }
-        response = await self._post_rotor_feedback(feedback_payload)
+        response = await self._post_rotor_feedback(feedback_payload, now)
         self._append_sequence_from_feedback(response)
 
     async def _send_finish_and_start_feedback(
@@ -488,120 +619,70 @@ class YandexMusicProvider(MusicProvider):
         finished_track_length_seconds: float,
         started_track_id: str,
         total_played_seconds: float,
+        now: datetime,
     ) -> None:
         if not self._session_id or not finished_track_id or not started_track_id:
             return
 
-        timestamp = datetime.now().astimezone().isoformat(timespec="milliseconds")
-        batch_id = self._session_batch_id or f"{uuid.uuid4()}.local"
+        timestamp = now.isoformat(timespec="milliseconds")
+        batch_id = self._feedback_batch_id()
+        finished_event = {
+            "timestamp": timestamp,
+            "totalPlayedSeconds": round(max(total_played_seconds, 0.0), 3),
+            "trackId": finished_track_id,
+            "trackLengthSeconds": round(max(finished_track_length_seconds, 0.0), 3),
+            "type": "trackFinished",
+        }
+        started_event = {"timestamp": timestamp, "trackId": started_track_id, "type": "trackStarted"}
         feedback_payload = {
             "feedbacks": [
-                {
-                    "batchId": batch_id,
-                    "event": {
-                        "timestamp": timestamp,
-                        "totalPlayedSeconds": round(max(total_played_seconds, 0.0), 3),
-                        "trackId": finished_track_id,
-                        "trackLengthSeconds": round(max(finished_track_length_seconds, 0.0), 3),
-                        "type": "trackFinished",
-                    },
-                    "from": self._feedback_from or "radio-mobile-user-onyourwave-default",
-                },
-                {
-                    "batchId": batch_id,
-                    "event": {
-                        "timestamp": timestamp,
-                        "trackId": started_track_id,
-                        "type": "trackStarted",
-                    },
-                    "from": self._feedback_from or "radio-mobile-user-onyourwave-default",
-                },
+                self._feedback_entry(batch_id, finished_event),
+                self._feedback_entry(batch_id, started_event),
             ],
             "queue": self._queue_refs(limit=2, start_offset=1),
         }
-        response = await self._post_rotor_feedback(feedback_payload)
+        response = await self._post_rotor_feedback(feedback_payload, now)
         self._append_sequence_from_feedback(response)
 
-    async def _send_skip_and_start_feedback(
+    async def _send_interrupt_and_start_feedback(
         self,
         *,
-        skipped_track_id: str,
+        interrupted_track_id: str,
         started_track_id: str,
         total_played_seconds: float,
+        event_type: str,
+        now: datetime,
     ) -> None:
         if not self._session_id:
             return
 
-        timestamp = datetime.now().astimezone().isoformat(timespec="milliseconds")
+        timestamp = now.isoformat(timespec="milliseconds")
+        started_event = {"timestamp": timestamp, "trackId": started_track_id, "type": "trackStarted"}
+        interrupted_event = {
+            "timestamp": timestamp,
+            "totalPlayedSeconds": round(max(total_played_seconds, 0.0), 3),
+            "trackId": interrupted_track_id,
+            "type": event_type,
+        }
         feedback_payload = {
             "feedbacks": [
-                {
-                    "batchId": f"{uuid.uuid4()}.local",
-                    "event": {
-                        "timestamp": timestamp,
-                        "trackId": started_track_id,
-                        "type": "trackStarted",
-                    },
-                    "from": self._feedback_from or "radio-mobile-user-onyourwave-default",
-                },
-                {
-                    "batchId": self._session_batch_id or f"{uuid.uuid4()}.local",
-                    "event": {
-                        "timestamp": timestamp,
-                        "totalPlayedSeconds": round(max(total_played_seconds, 0.0), 3),
-                        "trackId": skipped_track_id,
-                        "type": "skip",
-                    },
-                    "from": self._feedback_from or "radio-mobile-user-onyourwave-default",
-                },
+                self._feedback_entry(f"{uuid4_str()}.local", started_event),
+                self._feedback_entry(self._feedback_batch_id(), interrupted_event),
             ],
             "queue": self._queue_refs(limit=1),
         }
-        response = await self._post_rotor_feedback(feedback_payload)
+        response = await self._post_rotor_feedback(feedback_payload, now)
         self._append_sequence_from_feedback(response)
 
-    async def _send_dislike_and_start_feedback(
-        self,
-        *,
-        disliked_track_id: str,
-        started_track_id: str,
-        total_played_seconds: float,
-    ) -> None:
-        if not self._session_id:
-            return
+    def _feedback_batch_id(self) -> str:
+        return self._session_batch_id or f"{uuid4_str()}.local"
 
-        timestamp = datetime.now().astimezone().isoformat(timespec="milliseconds")
-        feedback_payload = {
-            "feedbacks": [
-                {
-                    "batchId": f"{uuid.uuid4()}.local",
-                    "event": {
-                        "timestamp": timestamp,
-                        "trackId": started_track_id,
-                        "type": "trackStarted",
-                    },
-                    "from": self._feedback_from or "radio-mobile-user-onyourwave-default",
-                },
-                {
-                    "batchId": self._session_batch_id or f"{uuid.uuid4()}.local",
-                    "event": {
-                        "timestamp": timestamp,
-                        "totalPlayedSeconds": round(max(total_played_seconds, 0.0), 3),
-                        "trackId": disliked_track_id,
-                        "type": "dislike",
-                    },
-                    "from": self._feedback_from or "radio-mobile-user-onyourwave-default",
-                },
-            ],
-            "queue": self._queue_refs(limit=1),
-        }
-        response = await self._post_rotor_feedback(feedback_payload)
-        self._append_sequence_from_feedback(response)
+    def _feedback_entry(self, batch_id: str, event: dict[str, Any]) -> dict[str, Any]:
+        return {"batchId": batch_id, "event": event, "from": self._feedback_from}
 
-    async def _post_rotor_feedback(self, feedback_payload: dict[str, Any]) -> dict[str, Any]:
-        feedback_endpoint = self._config.endpoint_rotor_session_tracks.format(session_id=self._session_id)
+    async def _post_rotor_feedback(self, feedback_payload: dict[str, Any], now: datetime) -> dict[str, Any]:
         try:
-            return await self._request_json("POST", feedback_endpoint, json=feedback_payload)
+            return await self._request_json("POST", self._feedback_endpoint, json=feedback_payload, now=now)
         except Exception as exc:  # noqa: BLE001
             LOGGER.warning(
                 "session feedback failed, falling back to sessions feedback endpoint: %s",
@@ -624,12 +705,13 @@ class YandexMusicProvider(MusicProvider):
                 "POST",
                 self._config.endpoint_rotor_sessions_feedbacks,
                 json=fallback_payload,
+                now=now,
             )
         except Exception:  # noqa: BLE001
             LOGGER.exception("sessions feedback fallback failed")
             return {}
 
-    async def _report_play_finished_if_needed(self, played_seconds: float) -> None:
+    async def _report_play_finished_if_needed(self, played_seconds: float, now: datetime) -> None:
         if not self._play_id or self._play_id == self._reported_finish_play_id:
             return
 
@@ -641,6 +723,7 @@ class YandexMusicProvider(MusicProvider):
             track_data=current_item,
             played_seconds=played_seconds,
             change_reason="finish",
+            now=now,
         )
 
     async def _report_play_event(
@@ -649,11 +732,12 @@ class YandexMusicProvider(MusicProvider):
         track_data: dict[str, Any],
         played_seconds: float,
         change_reason: str,
+        now: datetime,
     ) -> None:
         if not self._play_id or self._play_id == self._reported_finish_play_id:
             return
 
-        track_id = str(track_data.get("id", "")).strip()
+        track_id = track_data.get("id", "")
         if not track_id:
             return
 
@@ -667,7 +751,7 @@ class YandexMusicProvider(MusicProvider):
             ended_seconds = round(max(played_seconds, track_length_seconds), 3)
         else:
             ended_seconds = round(max(played_seconds, 0.0), 3)
-        now_iso = datetime.now().astimezone().isoformat(timespec="milliseconds")
+        now_iso = now.isoformat(timespec="milliseconds")
 
         payload = {
             "plays": [
@@ -677,7 +761,7 @@ class YandexMusicProvider(MusicProvider):
                     "audioOutputName": "Phone",
                     "audioOutputType": "other",
                     "isFromAutoflow": False,
-                    "batchId": self._session_batch_id or f"{uuid.uuid4()}.local",
+                    "batchId": self._feedback_batch_id(),
                     "changeReason": change_reason,
                     "context": "radio",
                     "contextItem": self._context_item,
@@ -685,14 +769,14 @@ class YandexMusicProvider(MusicProvider):
                     "endPositionSeconds": ended_seconds,
                     "expectedTrackLengthSeconds": round(track_length_seconds, 3),
                     "fadeMode": "crossfade",
-                    "from": self._feedback_from or "radio-mobile-user-onyourwave-default",
+                    "from": self._feedback_from,
                     "fromCache": False,
                     "listenActivity": "END",
                     "maxPlayerStage": "play",
-                    "navigationId": f"ym-bridge_{uuid.uuid4()}",
+                    "navigationId": f"ym-bridge_{uuid4_str()}",
                     "isFromOfflineWave": False,
                     "pause": False,
-                    "playbackActionId": str(uuid.uuid4()),
+                    "playbackActionId": uuid4_str(),
                     "isFromPumpkin": False,
                     "radioSessionId": self._session_id,
                     "isRepeated": False,
@@ -713,6 +797,7 @@ class YandexMusicProvider(MusicProvider):
             self._config.endpoint_plays,
             json=payload,
             extra_params={"client-now": now_iso},
+            now=now,
         )
         self._reported_finish_play_id = self._play_id
 
@@ -720,6 +805,10 @@ class YandexMusicProvider(MusicProvider):
         if not self._sequence:
             return Track(track_id="", title="", artist="")
         item = self._sequence[self._index]
+        if isinstance(item, dict):
+            cached = item.get(_TRACK_KEY)
+            if isinstance(cached, Track):
+                return cached
         track_data = item.get("track", {}) if isinstance(item, dict) else {}
         if not isinstance(track_data, dict):
             return Track(track_id="", title="", artist="")
@@ -744,8 +833,8 @@ class YandexMusicProvider(MusicProvider):
         if art_url:
             art_url = "https://" + art_url.replace("%%", "400x400")
 
-        return Track(
-            track_id=str(track_data.get("id", "")),
+        track = Track(
+            track_id=track_data.get("id", ""),
             title=str(track_data.get("title", "")),
             artist=", ".join(artist_names),
             album=album_title,
@@ -753,6 +842,9 @@ class YandexMusicProvider(MusicProvider):
             art_url=art_url,
             liked=bool(item.get("liked", False)) if isinstance(item, dict) else False,
         )
+        if isinstance(item, dict):
+            item[_TRACK_KEY] = track
+        return track
 
     def _set_current_liked(self, liked: bool) -> None:
         if not self._sequence:
@@ -760,25 +852,24 @@ class YandexMusicProvider(MusicProvider):
         current = self._sequence[self._index]
         if isinstance(current, dict):
             current["liked"] = liked
+            current.pop(_TRACK_KEY, None)
 
     def _mark_play_started(self) -> None:
-        self._play_id = str(uuid.uuid4())
+        self._play_id = uuid4_str()
         self._play_start_timestamp = datetime.now().astimezone().isoformat(timespec="milliseconds")
         self._reported_finish_play_id = ""
 
     async def _resolve_track_stream_url(self, track_id: str) -> str:
-        payload = await self._request_json("GET", f"/tracks/{track_id}/download-info")
+        payload = await self._request_json("GET", f"/tracks/{track_id}/download-info", needs_request_id=False)
         result = payload.get("result", [])
         if not isinstance(result, list) or not result:
             raise ReverseEngineeringRequiredError(f"No download info for track {track_id}")
 
-        chosen = None
-        for item in result:
-            if isinstance(item, dict) and item.get("codec") == "mp3":
-                chosen = item
-                break
-        if chosen is None:
-            chosen = result[0]
+        chosen = min(
+            (item for item in result if isinstance(item, dict) and item.get("codec") in _CODEC_RANK),
+            key=lambda item: _CODEC_RANK[item["codec"]],
+            default=result[0],
+        )
         if not isinstance(chosen, dict):
             raise ReverseEngineeringRequiredError(f"Unexpected download info shape for track {track_id}")
 
@@ -788,18 +879,18 @@ class YandexMusicProvider(MusicProvider):
 
         xml_response = await self._http.get(download_info_url)
         xml_response.raise_for_status()
-        xml_root = ET.fromstring(xml_response.text)
+        fields = {element.tag: element.text for element in ET.fromstring(xml_response.content, _XML_PARSER)}
 
-        host = xml_root.findtext("host")
-        path = xml_root.findtext("path")
-        ts = xml_root.findtext("ts")
-        secret = xml_root.findtext("s")
+        host = fields.get("host")
+        path = fields.get("path")
+        ts = fields.get("ts")
+        secret = fields.get("s")
 
         if not host or not path or not ts or not secret:
             raise ReverseEngineeringRequiredError("downloadInfo XML missing required fields")
 
-        sign_src = SIGN_SALT + path[1:] + secret
-        sign = hashlib.md5(sign_src.encode("utf-8")).hexdigest()
+        sign_src = _SIGN_SALT_BYTES + (path[1:] + secret).encode("utf-8")
+        sign = hashlib.md5(sign_src, usedforsecurity=False).hexdigest()
         return f"https://{host}/get-mp3/{sign}/{ts}{path}"
 
     async def _request_json(
@@ -808,23 +899,78 @@ class YandexMusicProvider(MusicProvider):
         endpoint: str,
         json: dict[str, Any] | None = None,
         extra_params: dict[str, str] | None = None,
+        now: datetime | None = None,
+        needs_request_id: bool = True,
     ) -> dict[str, Any]:
-        params: dict[str, str] = {}
-        if self._config.device_id:
-            params["device-id"] = self._config.device_id
-        if extra_params:
-            params.update(extra_params)
-        response = await self._http.request(
-            method,
-            endpoint,
-            params=params or None,
-            json=json,
-            headers={
-                "X-Request-Id": str(uuid.uuid4()),
-                "X-Yandex-Music-Client-Now": datetime.now().astimezone().isoformat(timespec="seconds"),
-            },
-        )
+        params = {**self._base_params, **extra_params} if extra_params else self._base_params
+        client_now = now.isoformat(timespec="seconds") if now is not None else client_now_iso()
+        headers = {"X-Yandex-Music-Client-Now": client_now}
+        if needs_request_id:
+            headers["X-Request-Id"] = uuid4_str()
+        response = await self._http.request(method, endpoint, params=params or None, json=json, headers=headers)
         response.raise_for_status()
         if not response.content:
             return {}
-        return response.json()
+        return loads(response.content)
+
+
+@functools.lru_cache(maxsize=32)
+def api_headers(
+    *,
+    accept_language: str,
+    user_agent: str,
+    music_client: str,
+    content_type: str,
+    device_header: str,
+    oauth_token: str,
+) -> Mapping[str, str]:
+    headers = {
+        "Accept": "application/json",
+        "Accept-Language": accept_language,
+        "User-Agent": user_agent,
+        "X-Yandex-Music-Client": music_client,
+        "X-Yandex-Music-Content-Type": content_type,
+        "X-Yandex-Music-Device": device_header,
+    }
+    if oauth_token:
+        headers["Authorization"] = f"OAuth {oauth_token}"
+    # Cached and shared between clients, so callers get a read-only view.
+    return MappingProxyType(headers)
+
+
+def _build_queue_ref(track_data: dict[str, Any]) -> str:
+    track_id = str(track_data.get("id", "")).strip()
+    albums = track_data.get("albums", [])
+    if not track_id or not isinstance(albums, list) or not albums:
+        return ""
+    first = albums[0]
+    if not isinstance(first, dict):
+        return ""
+    album_id = str(first.get("id", "")).strip()
+    if not album_id:
+        return ""
+    return f"{track_id}:{album_id}"
+
+
+def client_now_iso() -> str:
+    # Same output as datetime.now().astimezone().isoformat(timespec="seconds"), formatted in C.
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime())
+    return f"{stamp[:-2]}:{stamp[-2:]}"
+
+
+def uuid4_str() -> str:
+    return _format_uuid4(bytearray(os.urandom(16)))
+
+
+def uuid4_strs(count: int) -> list[str]:
+    # One urandom call for the whole batch.
+    raw = os.urandom(16 * count)
+    return [_format_uuid4(bytearray(raw[offset : offset + 16])) for offset in range(0, len(raw), 16)]
+
+
+def _format_uuid4(raw: bytearray) -> str:
+    # Same output as str(uuid.uuid4()) without building a UUID object.
+    raw[6] = (raw[6] & 0x0F) | 0x40
+    raw[8] = (raw[8] & 0x3F) | 0x80
+    digits = raw.hex()
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
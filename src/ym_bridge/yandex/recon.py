@@ -1,14 +1,23 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
-import json
+import os
 from pathlib import Path
+import random
 from typing import Any
-import uuid
 
 import httpx
 
+from ym_bridge.serialization import dumps, loads
+from ym_bridge.yandex.client import HTTP2_AVAILABLE, api_headers, client_now_iso, uuid4_strs
+
+_BODY_TEXT_LIMIT = 5000
+# Bodies are read up to this size; anything longer is recorded as a truncated text prefix.
+_BODY_BYTE_LIMIT = 4 * 1024 * 1024
+_PROBE_ATTEMPTS = 3
+
 
 @dataclass(slots=True)
 class ProbeResult:
@@ -26,6 +35,24 @@ class ProbeSpec:
     path: str
     body: dict[str, Any] | None = None
     query: dict[str, str] | None = None
+    file_name: str = field(init=False, default="")
+
+    def __post_init__(self) -> None:
+        self.file_name = f"{self.method}_{self.path.strip('/').replace('/', '_') or 'root'}.json"
+
+
+@dataclass(slots=True)
+class _ProbeRun:
+    http: httpx.AsyncClient
+    device_id: str
+    output_dir: Path
+    stamp: str
+    request_ids: list[str]
+    transport_failures: int = 0
+
+
+class _CircuitOpenError(RuntimeError):
+    pass
 
 
 DEFAULT_PROBES: tuple[ProbeSpec, ...] = (
@@ -59,6 +86,9 @@ DEFAULT_PROBES: tuple[ProbeSpec, ...] = (
         },
     ),
 )
+# Transport errors are retried with jittered backoff. Once a run has seen as many consecutive transport failures as
+# it has probes, the host is treated as down and the remaining attempts fail fast.
+_CIRCUIT_FAILURE_THRESHOLD = len(DEFAULT_PROBES)
 
 
 async def run_recon(
@@ -74,89 +104,168 @@ async def run_recon(
     output_dir: Path,
 ) -> list[ProbeResult]:
     output_dir.mkdir(parents=True, exist_ok=True)
-    results: list[ProbeResult] = []
 
+    # The probes of one run go out together, so they share one client-now value.
     headers = {
-        "Accept": "application/json",
-        "Accept-Language": accept_language,
-        "User-Agent": user_agent,
-        "X-Yandex-Music-Client": music_client,
-        "X-Yandex-Music-Content-Type": content_type,
-        "X-Yandex-Music-Device": device_header,
+        **api_headers(
+            accept_language=accept_language,
+            user_agent=user_agent,
+            music_client=music_client,
+            content_type=content_type,
+            device_header=device_header,
+            oauth_token=oauth_token,
+        ),
+        "X-Yandex-Music-Client-Now": client_now_iso(),
     }
-    if oauth_token:
-        headers["Authorization"] = f"OAuth {oauth_token}"
-
-    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=20) as http:
-        for probe in DEFAULT_PROBES:
-            method = probe.method
-            path = probe.path
-            body = probe.body
-
-            params: dict[str, str] = {}
-            if device_id:
-                params["device-id"] = device_id
-            if probe.query:
-                params.update(probe.query)
-
-            stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
-            out_file = output_dir / f"{stamp}_{method}_{path.strip('/').replace('/', '_') or 'root'}.json"
-            try:
-                response = await http.request(
-                    method,
-                    path,
-                    params=params or None,
-                    json=body,
-                    headers={
-                        "X-Request-Id": str(uuid.uuid4()),
-                        "X-Yandex-Music-Client-Now": datetime.now().astimezone().isoformat(timespec="seconds"),
-                    },
-                )
-                payload = {
-                    "method": method,
-                    "path": path,
-                    "query": params or None,
-                    "request_json": body,
-                    "status_code": response.status_code,
-                    "headers": dict(response.headers),
-                    "body": _best_effort_body(response),
-                }
-                result = ProbeResult(
-                    method=method,
-                    path=path,
-                    status_code=response.status_code,
-                    content_type=response.headers.get("content-type", ""),
-                    output_file=out_file,
-                )
-            except Exception as exc:  # noqa: BLE001
-                payload = {
-                    "method": method,
-                    "path": path,
-                    "query": params or None,
-                    "request_json": body,
-                    "error": repr(exc),
-                }
-                result = ProbeResult(
-                    method=method,
-                    path=path,
-                    status_code=0,
-                    content_type="",
-                    output_file=out_file,
-                    error=repr(exc),
-                )
-            out_file.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-            results.append(result)
-
-    return results
-
-
-def _best_effort_body(response: httpx.Response) -> object:
-    if not response.content:
+
+    # With h2 every probe multiplexes over one connection; HTTP/1.1 needs one connection per in-flight probe.
+    limits = httpx.Limits(max_connections=1 if HTTP2_AVAILABLE else len(DEFAULT_PROBES))
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, timeout=20, limits=limits, http2=HTTP2_AVAILABLE
+    ) as http:
+        # One run shares a stamp; the probe index keeps file names unique.
+        run = _ProbeRun(
+            http=http,
+            device_id=device_id,
+            output_dir=output_dir,
+            stamp=datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ"),
+            request_ids=uuid4_strs(len(DEFAULT_PROBES)),
+        )
+        # Probes are independent, so they run concurrently; gather keeps DEFAULT_PROBES order in the results.
+        return await asyncio.gather(*(_run_probe(run, index, probe) for index, probe in enumerate(DEFAULT_PROBES)))
+
+
+async def _run_probe(run: _ProbeRun, index: int, probe: ProbeSpec) -> ProbeResult:
+    method = probe.method
+    path = probe.path
+    body = probe.body
+    out_file = run.output_dir / f"{run.stamp}_{index:02d}_{probe.file_name}"
+
+    params: dict[str, str] = {}
+    if run.device_id:
+        params["device-id"] = run.device_id
+    if probe.query:
+        params.update(probe.query)
+
+    raw_body: bytes | None = None
+    try:
+        response, content = await _fetch_probe(run, run.request_ids[index], method, path, params, body)
+        payload = {
+            "method": method,
+            "path": path,
+            "query": params or None,
+            "request_json": body,
+            "status_code": response.status_code,
+            "headers": response.headers.multi_items(),
+        }
+        raw_body = _json_body(content)
+        if raw_body is None:
+            payload["body"] = _text_body(content, response.encoding)
+            if len(content) > _BODY_BYTE_LIMIT:
+                payload["body_truncated"] = True
+        result = ProbeResult(
+            method=method,
+            path=path,
+            status_code=response.status_code,
+            content_type=response.headers.get("content-type", ""),
+            output_file=out_file,
+        )
+    except Exception as exc:  # noqa: BLE001
+        error = "circuit-open" if isinstance(exc, _CircuitOpenError) else repr(exc)
+        payload = {
+            "method": method,
+            "path": path,
+            "query": params or None,
+            "request_json": body,
+            "error": error,
+        }
+        result = ProbeResult(
+            method=method,
+            path=path,
+            status_code=0,
+            content_type="",
+            output_file=out_file,
+            error=error,
+        )
+    data = dumps(payload, indent=True)
+    if raw_body is not None:
+        # A valid JSON body is spliced in verbatim rather than decoded and encoded again.
+        data = data[:-2] + b',\n  "body": ' + raw_body + b"\n}"
+    await asyncio.to_thread(_write_atomic, out_file, data)
+    return result
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+async def _fetch_probe(
+    run: _ProbeRun,
+    request_id: str,
+    method: str,
+    path: str,
+    params: dict[str, str],
+    body: dict[str, Any] | None,
+) -> tuple[httpx.Response, bytearray]:
+    attempt = 0
+    while True:
+        if run.transport_failures >= _CIRCUIT_FAILURE_THRESHOLD:
+            raise _CircuitOpenError
+        try:
+            fetched = await _stream_probe(run, request_id, method, path, params, body)
+        except httpx.TransportError:
+            run.transport_failures += 1
+            if attempt + 1 == _PROBE_ATTEMPTS:
+                raise
+            await asyncio.sleep(random.uniform(0, min(2**attempt, 4)))
+            attempt += 1
+            continue
+        run.transport_failures = 0
+        return fetched
+
+
+async def _stream_probe(
+    run: _ProbeRun,
+    request_id: str,
+    method: str,
+    path: str,
+    params: dict[str, str],
+    body: dict[str, Any] | None,
+) -> tuple[httpx.Response, bytearray]:
+    async with run.http.stream(
+        method,
+        path,
+        params=params or None,
+        json=body,
+        headers={"X-Request-Id": request_id},
+    ) as response:
+        content = bytearray()
+        async for chunk in response.aiter_bytes():
+            content += chunk
+            if len(content) > _BODY_BYTE_LIMIT:
+                break
+    return response, content
+
+
+def _json_body(content: bytearray) -> bytes | None:
+    if not content or len(content) > _BODY_BYTE_LIMIT:
         return None
     try:
-        return response.json()
+        loads(content)
     except ValueError:
-        text = response.text
-        if len(text) > 5000:
-            return text[:5000]
-        return text
+        return None
+    return bytes(content)
+
+
+def _text_body(content: bytearray, encoding: str | None) -> str | None:
+    if not content:
+        return None
+    # Four bytes cover any character, so only decode the prefix that can end up in the dump.
+    raw = bytes(content[: _BODY_TEXT_LIMIT * 4])
+    return raw.decode(encoding or "utf-8", errors="replace")[:_BODY_TEXT_LIMIT]